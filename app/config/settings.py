@@ -92,10 +92,24 @@ if DB_ENGINE == "postgres":
             "PASSWORD": config("POSTGRES_PASSWORD"),
             "HOST": config("POSTGRES_HOST", default="localhost"),
             "PORT": config("POSTGRES_PORT", default="5432"),
-            # Si tu proveedor exige SSL (p. ej. Render/Neon), activa DB_SSL_REQUIRE=true
-            "OPTIONS": {"sslmode": "require"} if config("DB_SSL_REQUIRE", cast=bool, default=False) else {},
+            # Conexiones persistentes: cada worker reutiliza su conexión durante
+            # CONN_MAX_AGE segundos en vez de abrir una (TCP+TLS+auth) por request.
+            "CONN_MAX_AGE": config("CONN_MAX_AGE", cast=int, default=60),
+            "CONN_HEALTH_CHECKS": True,
+            # Si hay pgbouncer en modo "transaction pooling" delante, activa
+            # DB_DISABLE_SERVER_SIDE_CURSORS=true (los cursores con nombre no sobreviven).
+            "DISABLE_SERVER_SIDE_CURSORS": config("DB_DISABLE_SERVER_SIDE_CURSORS", cast=bool, default=False),
+            "OPTIONS": {},
         }
     }
+    # Si tu proveedor exige SSL (p. ej. Render/Neon), activa DB_SSL_REQUIRE=true
+    if config("DB_SSL_REQUIRE", cast=bool, default=False):
+        DATABASES["default"]["OPTIONS"]["sslmode"] = "require"
+    # Driver psycopg 3: con DB_SERVER_SIDE_BINDING=true los parámetros se envían
+    # aparte de la consulta (prepared statements del lado del servidor).
+    # No lo actives detrás de pgbouncer en modo "transaction pooling".
+    if config("DB_SERVER_SIDE_BINDING", cast=bool, default=False):
+        DATABASES["default"]["OPTIONS"]["server_side_binding"] = True
 else:
     # Predeterminado: como lo tienes ahora mismo
     DATABASES = {
@@ -105,6 +119,38 @@ else:
         }
     }
 
+# -----------------------------
+# Caché
+# -----------------------------
+# Se usa para los resultados de disponibilidad (hotel/cache.py). La invalidación
+# (hotel/signals.py) sube una versión guardada en la propia caché, así que solo
+# llega a todos los workers de gunicorn si la caché es compartida:
+#   - REDIS_URL=redis://...  → Redis, compartida por todos los workers (render.yaml la define).
+#   - Sin REDIS_URL y DB_ENGINE=postgres → sin caché: con una caché por proceso,
+#     los demás workers seguirían mostrando como libres habitaciones ya reservadas.
+#   - Sin REDIS_URL con SQLite (desarrollo, un solo proceso) → LocMemCache.
+REDIS_URL = config("REDIS_URL", default="")
+
+if REDIS_URL:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": REDIS_URL,
+        }
+    }
+elif DB_ENGINE == "postgres":
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.dummy.DummyCache",
+        }
+    }
+else:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        }
+    }
+
 # -----------------------------
 # Passwords
 # -----------------------------
@@ -1,13 +1,41 @@
+from django import forms
 from django.contrib import admin
 from .models import Room, Booking
 
 
+class RoomAdminForm(forms.ModelForm):
+    # El precio se captura en pesos; el modelo lo guarda en centavos (base_price_cents)
+    base_price = forms.DecimalField(
+        max_digits=10, decimal_places=2, min_value=0, label="Base price", help_text="Precio base por noche"
+    )
+
+    class Meta:
+        model = Room
+        exclude = ("base_price_cents",)
+
+    def __init__(self, *args, **kwargs):
+        instance = kwargs.get("instance")
+        if instance is not None and instance.base_price_cents is not None:
+            kwargs["initial"] = {"base_price": instance.base_price, **(kwargs.get("initial") or {})}
+        super().__init__(*args, **kwargs)
+
+    def save(self, commit=True):
+        self.instance.base_price = self.cleaned_data["base_price"]
+        return super().save(commit)
+
+
 @admin.register(Room)
 class RoomAdmin(admin.ModelAdmin):
-    list_display = ("number", "room_type", "capacity", "base_price", "status", "floor")
+    form = RoomAdminForm
+    fields = ("number", "floor", "room_type", "capacity", "base_price", "status")
+    list_display = ("number", "room_type", "capacity", "price", "status", "floor")
     list_filter = ("room_type", "status", "floor")
     search_fields = ("number",)
 
+    @admin.display(description="Base price", ordering="base_price_cents")
+    def price(self, obj):
+        return f"${obj.base_price:.2f}"
+
 @admin.register(Booking)
 class BookingAdmin(admin.ModelAdmin):
     list_display = ("room", "guest_name", "check_in", "check_out", "status", "guests_count", "created_at")
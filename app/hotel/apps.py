@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class HotelConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "hotel"
+
+    def ready(self):
+        # Registra los receivers de señales (invalidación de caché)
+        from . import signals  # noqa: F401
@@ -0,0 +1,46 @@
+# hotel/cache.py
+# ----------------------------------------
+# Caché de resultados de disponibilidad.
+#
+# La búsqueda de habitaciones libres depende solo de
+# (check_in, check_out, room_type, guests_count) más la página, y muchos usuarios
+# buscan con las mismas fechas por defecto. Guardamos la lista de
+# habitaciones por esa combinación durante unos segundos.
+#
+# Invalidación: en vez de borrar llaves por patrón (no todos los
+# backends lo soportan), todas las llaves llevan una "versión" global.
+# Cualquier cambio en Room o Booking incrementa la versión y las
+# entradas anteriores dejan de leerse (expiran solas por timeout).
+# ----------------------------------------
+
+from datetime import date
+from urllib.parse import quote
+
+from django.core.cache import cache
+
+AVAILABILITY_TIMEOUT = 60  # segundos
+
+_VERSION_KEY = "avail:version"
+
+
+def availability_key(
+    check_in: date, check_out: date, room_type: str, guests_count: int, after_number: str = ""
+) -> str:
+    # after_number viene del usuario: lo codificamos (%XX) para que la llave no lleve
+    # espacios ni caracteres de control, que Memcached rechaza.
+    return (
+        f"avail:{check_in.isoformat()}:{check_out.isoformat()}:{room_type or ''}:{guests_count}:"
+        f"{quote(after_number, safe='')}"
+    )
+
+
+def availability_version() -> int:
+    return cache.get_or_set(_VERSION_KEY, 1, timeout=None)
+
+
+def bump_availability_version() -> None:
+    try:
+        cache.incr(_VERSION_KEY)
+    except ValueError:
+        # La llave no existe (primer cambio o fue desalojada)
+        cache.set(_VERSION_KEY, availability_version() + 1, timeout=None)
@@ -0,0 +1,46 @@
+from django.db import migrations
+
+# Restricción de exclusión: dos reservas activas de la misma habitación no
+# pueden tener rangos [check_in, check_out) que se solapen. Postgres la respalda
+# con un índice GiST sobre (room_id, daterange), así que además de garantizar la
+# consistencia bajo concurrencia, acelera las búsquedas por solapamiento (&&).
+#
+# Solo aplica en Postgres (DB_ENGINE=postgres); en SQLite no hace nada y la
+# validación queda a cargo de BookingService.
+CREATE_SQL = [
+    "CREATE EXTENSION IF NOT EXISTS btree_gist",
+    """
+    ALTER TABLE hotel_booking
+    ADD CONSTRAINT no_booking_overlap
+    EXCLUDE USING gist (
+        room_id WITH =,
+        daterange(check_in, check_out, '[)') WITH &&
+    )
+    WHERE (status IN ('reserved', 'checked_in'))
+    """,
+]
+
+DROP_SQL = [
+    "ALTER TABLE hotel_booking DROP CONSTRAINT IF EXISTS no_booking_overlap",
+]
+
+
+def _run(statements):
+    def run(apps, schema_editor):
+        if schema_editor.connection.vendor != "postgresql":
+            return
+        for sql in statements:
+            schema_editor.execute(sql)
+
+    return run
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("hotel", "0002_booking"),
+    ]
+
+    operations = [
+        migrations.RunPython(_run(CREATE_SQL), _run(DROP_SQL)),
+    ]
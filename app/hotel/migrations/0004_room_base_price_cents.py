@@ -0,0 +1,52 @@
+# Generated by Django 4.2.4 on 2026-10-14 11:02
+
+from decimal import Decimal
+
+from django.db import migrations, models
+
+
+def price_to_cents(apps, schema_editor):
+    Room = apps.get_model("hotel", "Room")
+    for room in Room.objects.only("id", "base_price"):
+        room.base_price_cents = int((Decimal(room.base_price) * 100).to_integral_value())
+        room.save(update_fields=["base_price_cents"])
+
+
+def cents_to_price(apps, schema_editor):
+    Room = apps.get_model("hotel", "Room")
+    for room in Room.objects.only("id", "base_price_cents"):
+        room.base_price = Decimal(room.base_price_cents).scaleb(-2)
+        room.save(update_fields=["base_price"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("hotel", "0003_booking_no_overlap_constraint"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="room",
+            name="base_price",
+            field=models.DecimalField(
+                decimal_places=2,
+                help_text="Precio base por noche",
+                max_digits=10,
+                null=True,
+            ),
+        ),
+        migrations.AddField(
+            model_name="room",
+            name="base_price_cents",
+            field=models.PositiveBigIntegerField(
+                default=0, help_text="Precio base por noche, en centavos"
+            ),
+            preserve_default=False,
+        ),
+        migrations.RunPython(price_to_cents, cents_to_price),
+        migrations.RemoveField(
+            model_name="room",
+            name="base_price",
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 4.2.4 on 2026-10-14 13:13
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("hotel", "0004_room_base_price_cents"),
+    ]
+
+    operations = [
+        migrations.AddConstraint(
+            model_name="booking",
+            constraint=models.CheckConstraint(
+                check=models.Q(("check_out__gt", models.F("check_in"))),
+                name="booking_valid_range",
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="booking",
+            constraint=models.CheckConstraint(
+                check=models.Q(("guests_count__gte", 1)),
+                name="booking_guests_positive",
+            ),
+        ),
+    ]
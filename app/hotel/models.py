@@ -1,5 +1,8 @@
+from decimal import Decimal
+
 from django.core.exceptions import ValidationError
 from django.db import models
+from django.db.models import F, Func, Q, Value
 from django.utils import timezone
 
 class Room(models.Model):
@@ -18,7 +21,8 @@ class Room(models.Model):
     floor = models.IntegerField(null=True, blank=True)
     room_type = models.CharField(max_length=10, choices=RoomType.choices, default=RoomType.SINGLE)
     capacity = models.PositiveIntegerField(default=1)
-    base_price = models.DecimalField(max_digits=10, decimal_places=2, help_text="Precio base por noche")
+    # Se guarda en centavos (entero): la aritmética y la lectura de filas son más baratas que con Decimal
+    base_price_cents = models.PositiveBigIntegerField(help_text="Precio base por noche, en centavos")
     status = models.CharField(max_length=12, choices=RoomStatus.choices, default=RoomStatus.AVAILABLE)
 
     class Meta:
@@ -31,6 +35,15 @@ class Room(models.Model):
     def __str__(self) -> str:
         return f"Room {self.number} ({self.get_room_type_display()})"
 
+    @property
+    def base_price(self) -> Decimal:
+        """Precio base por noche, en pesos (ej. Decimal("1250.00"))."""
+        return Decimal(self.base_price_cents).scaleb(-2)
+
+    @base_price.setter
+    def base_price(self, value) -> None:
+        self.base_price_cents = int((Decimal(value) * 100).to_integral_value())
+
 class Booking(models.Model):
     class BookingStatus(models.TextChoices):
         RESERVED = "reserved", "Reserved"
@@ -49,9 +62,64 @@ class Booking(models.Model):
     class Meta:
         ordering = ["-check_in", "-created_at"]
         indexes = [
+            # Atiende el predicado de solapamiento de BookingService y room_availability:
+            #   room = ? AND check_in < co AND check_out > ci AND status IN (activas)
+            # No lo reducimos a un índice parcial "solo activas": SQLite solo usa un
+            # índice parcial si la consulta repite su WHERE literalmente, y Django
+            # envía los estados del IN como parámetros, así que nunca lo elegiría.
+            # En Postgres StayOverlaps usa el índice GiST de no_booking_overlap (migración 0003).
             models.Index(fields=["room", "check_in", "check_out"]),
             models.Index(fields=["status"]),
         ]
+        constraints = [
+            models.CheckConstraint(check=Q(check_out__gt=F("check_in")), name="booking_valid_range"),
+            models.CheckConstraint(check=Q(guests_count__gte=1), name="booking_guests_positive"),
+        ]
 
     def __str__(self) -> str:
-        return f"Booking #{self.pk or 'new'} — Room {self.room.number} — {self.guest_name}"
\ No newline at end of file
+        return f"Booking #{self.pk or 'new'} — Room {self.room.number} — {self.guest_name}"
+
+
+# Estados que "ocupan" una habitación. Fuente única para servicios y vistas.
+ACTIVE_BOOKING_STATUSES = frozenset({
+    Booking.BookingStatus.RESERVED,
+    Booking.BookingStatus.CHECKED_IN,
+})
+ACTIVE_BOOKING_Q = Q(status__in=ACTIVE_BOOKING_STATUSES)
+
+
+class StayOverlaps(Func):
+    """
+    Condición "la estancia [check_in, check_out) se solapa con [start, end)".
+
+    - En general se compila a `check_in < end AND check_out > start`
+      (lo atiende el índice (room, check_in, check_out)).
+    - En Postgres se compila a `daterange(check_in, check_out, '[)') && daterange(start, end, '[)')`,
+      que coincide con la restricción no_booking_overlap y usa su índice GiST.
+
+    Uso: Booking.objects.filter(StayOverlaps(check_in, check_out))
+    """
+
+    arity = 4
+    output_field = models.BooleanField()
+
+    def __init__(self, start, end):
+        super().__init__(F("check_in"), F("check_out"), Value(start), Value(end))
+
+    def _compile_parts(self, compiler):
+        sqls, params = [], []
+        for expression in self.get_source_expressions():
+            sql, expression_params = compiler.compile(expression)
+            sqls.append(sql)
+            params.append(expression_params)
+        return sqls, params
+
+    def as_sql(self, compiler, connection, **extra_context):
+        (check_in, check_out, start, end), (p_ci, p_co, p_start, p_end) = self._compile_parts(compiler)
+        # Solapamiento si: A < D y C < B
+        return f"({check_in} < {end} AND {check_out} > {start})", (*p_ci, *p_end, *p_co, *p_start)
+
+    def as_postgresql(self, compiler, connection, **extra_context):
+        (check_in, check_out, start, end), (p_ci, p_co, p_start, p_end) = self._compile_parts(compiler)
+        sql = f"(daterange({check_in}, {check_out}, '[)') && daterange({start}, {end}, '[)'))"
+        return sql, (*p_ci, *p_co, *p_start, *p_end)
@@ -1,10 +1,39 @@
 from datetime import date
+from functools import lru_cache
 from typing import Optional
 
 from django.core.exceptions import ValidationError
-from django.db import transaction
+from django.db import IntegrityError, connection, transaction
 
-from .models import Room, Booking
+from .models import ACTIVE_BOOKING_Q, ACTIVE_BOOKING_STATUSES, Room, Booking, StayOverlaps
+
+# Consulta de solapamiento precompilada: siempre tiene la misma forma, así que
+# el ORM la compila una sola vez por motor y en cada llamada solo cambian los
+# parámetros. El predicado sigue definido en un único lugar (StayOverlaps).
+_ROOM_SLOT = -1
+_START_SLOT = date(1, 1, 1)
+_END_SLOT = date(1, 1, 2)
+
+
+@lru_cache(maxsize=None)
+def _overlap_query(vendor: str) -> tuple[str, tuple]:
+    """
+    Devuelve (sql, slots): `slots` indica, por cada parámetro, si se sustituye
+    por "room", "start" o "end", o si es un valor fijo (los estados activos).
+    """
+    qs = (
+        Booking.objects.filter(ACTIVE_BOOKING_Q, StayOverlaps(_START_SLOT, _END_SLOT), room_id=_ROOM_SLOT)
+        .order_by()
+        .values("pk")[:1]
+    )
+    sql, params = qs.query.get_compiler(connection=connection).as_sql()
+    markers = {
+        _ROOM_SLOT: "room",
+        connection.ops.adapt_datefield_value(_START_SLOT): "start",
+        connection.ops.adapt_datefield_value(_END_SLOT): "end",
+    }
+    slots = tuple(markers.get(param, (param,)) for param in params)
+    return sql, slots
 
 
 class BookingService:
@@ -15,17 +44,18 @@ class BookingService:
     - Es decir, la noche de check_out NO se incluye.
     - Back-to-back es válido: si una reserva termina el 1/oct, una nueva que
       inicia el 1/oct NO solapa.
+
+    En Postgres la restricción `no_booking_overlap` (migración 0003) impone
+    la misma regla en la base de datos con un índice GiST sobre daterange.
     """
 
-    ACTIVE_STATUSES = (
-        Booking.BookingStatus.RESERVED,
-        Booking.BookingStatus.CHECKED_IN,
-    )
+    ACTIVE_STATUSES = ACTIVE_BOOKING_STATUSES
 
     def __init__(self, room: Room):
         self.room = room
 
-    def _validate_range(self, check_in: date, check_out: date) -> None:
+    @staticmethod
+    def _validate_range(check_in: date, check_out: date) -> None:
         if not isinstance(check_in, date) or not isinstance(check_out, date):
             raise ValidationError("check_in y check_out deben ser fechas (date).")
         if check_in >= check_out:
@@ -44,17 +74,20 @@ class BookingService:
         if self.room.status == Room.RoomStatus.MAINTENANCE:
             return False
 
-        # Solapamiento si: A < D y C < B
-        overlapping = Booking.objects.filter(
-            room=self.room,
-            status__in=self.ACTIVE_STATUSES,
-            check_in__lt=check_out,
-            check_out__gt=check_in,
-        ).exists()
+        return not self._has_overlap(self.room, check_in, check_out)
 
-        return not overlapping
+    def _has_overlap(self, room: Room, check_in: date, check_out: date) -> bool:
+        sql, slots = _overlap_query(connection.vendor)
+        values = {
+            "room": room.pk,
+            "start": connection.ops.adapt_datefield_value(check_in),
+            "end": connection.ops.adapt_datefield_value(check_out),
+        }
+        params = [values[slot] if isinstance(slot, str) else slot[0] for slot in slots]
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            return cursor.fetchone() is not None
 
-    @transaction.atomic
     def reserve(
         self,
         check_in: date,
@@ -65,20 +98,47 @@ class BookingService:
     ) -> Booking:
         """
         Crea una reserva si hay disponibilidad. Lanza ValidationError si no.
+        Ver `reserve_room`: la habitación se vuelve a leer (y bloquear) dentro de
+        la transacción, así que no importa si `self.room` está desactualizado.
+        """
+        return self.reserve_room(self.room.pk, check_in, check_out, guest_name, guests_count, status)
+
+    @classmethod
+    @transaction.atomic
+    def reserve_room(
+        cls,
+        room_id: int,
+        check_in: date,
+        check_out: date,
+        guest_name: str,
+        guests_count: int = 1,
+        status: Optional[str] = None,
+    ) -> Booking:
+        """
+        Crea una reserva para la habitación `room_id` si hay disponibilidad.
+        Lanza ValidationError si no, y Room.DoesNotExist si la habitación no existe.
         - `status` por defecto = RESERVED.
-        - Valida capacidad mediante Booking.full_clean() (si lo definiste).
+        - Bloquea la fila del Room (SELECT ... FOR UPDATE) para que dos
+          reservas concurrentes no pasen ambas el chequeo de solapamiento.
+        - Para quien solo tiene el id (p. ej. la vista): esa lectura con bloqueo
+          es la única consulta al Room.
         """
-        self._validate_range(check_in, check_out)
+        cls._validate_range(check_in, check_out)
+
+        # Bloqueamos la habitación: las reservas sobre el mismo Room quedan
+        # serializadas hasta el commit, cerrando la carrera entre chequeo e INSERT.
+        room = Room.objects.select_for_update().only("id", "number", "status").get(pk=room_id)
+        service = cls(room)
 
-        # Checar disponibilidad previa
-        if not self.is_available(check_in, check_out):
+        # Checar disponibilidad con el estado recién bloqueado
+        if room.status == Room.RoomStatus.MAINTENANCE or service._has_overlap(room, check_in, check_out):
             raise ValidationError("La habitación no está disponible en ese periodo.")
 
         if status is None:
             status = Booking.BookingStatus.RESERVED
 
         booking = Booking(
-            room=self.room,
+            room=room,
             guest_name=guest_name,
             guests_count=guests_count,
             check_in=check_in,
@@ -86,7 +146,14 @@ class BookingService:
             status=status,
         )
 
-        # Ejecuta validaciones del modelo (capacidad, mantenimiento, etc.)
-        booking.full_clean()
-        booking.save()
-        return booking
\ No newline at end of file
+        # Solo validadores de campo (en memoria, sin consultas): el Room ya se leyó
+        # (y bloqueó) arriba, así que omitimos la validación del FK. Las reglas de
+        # rango, huéspedes y solapamiento las garantiza la base de datos.
+        booking.clean_fields(exclude=["room"])
+        try:
+            booking.save()
+        except IntegrityError as e:
+            if "no_booking_overlap" in str(e):
+                raise ValidationError("La habitación no está disponible en ese periodo.") from e
+            raise ValidationError("Los datos de la reserva no son válidos.") from e
+        return booking
@@ -0,0 +1,22 @@
+# hotel/signals.py
+# ----------------------------------------
+# Invalida la caché de disponibilidad cuando cambian
+# habitaciones o reservas. Se conecta en HotelConfig.ready().
+# ----------------------------------------
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .cache import bump_availability_version
+from .models import Booking, Room
+
+
+@receiver(post_save, sender=Booking)
+@receiver(post_delete, sender=Booking)
+@receiver(post_save, sender=Room)
+@receiver(post_delete, sender=Room)
+def invalidate_availability(sender, **kwargs):
+    # on_commit: si invalidáramos antes del commit, otra request podría volver
+    # a cachear el estado anterior mientras la transacción sigue abierta.
+    transaction.on_commit(bump_availability_version)
@@ -1,3 +1,325 @@
-from django.test import TestCase
+from datetime import date
+from decimal import Decimal
+from importlib.util import find_spec
+from unittest import mock, skipUnless
+import warnings
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.cache.backends.base import CacheKeyWarning
+from django.core.exceptions import ValidationError
+from django.db import IntegrityError, connection
+from django.db.migrations.executor import MigrationExecutor
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+
+from .admin import RoomAdminForm
+from .models import Booking, Room, StayOverlaps
+from .services import BookingService, _overlap_query
+
+
+def _book(room, check_in, check_out, status=Booking.BookingStatus.RESERVED):
+    return Booking.objects.create(
+        room=room, guest_name="Huésped", check_in=check_in, check_out=check_out, status=status
+    )
+
+
+class BookingServiceTests(TestCase):
+    def setUp(self):
+        self.room = Room.objects.create(number="101", base_price="100.00", capacity=2)
+        # Reserva existente: noches del 10 al 12 (check_out el 13)
+        _book(self.room, date(2030, 1, 10), date(2030, 1, 13))
+
+    def test_is_available(self):
+        cases = [
+            # (check_in, check_out, disponible)
+            (date(2030, 1, 5), date(2030, 1, 10), True),  # termina cuando empieza la reserva
+            (date(2030, 1, 13), date(2030, 1, 15), True),  # empieza cuando termina la reserva
+            (date(2030, 1, 5), date(2030, 1, 11), False),  # solapa el inicio
+            (date(2030, 1, 12), date(2030, 1, 15), False),  # solapa el final
+            (date(2030, 1, 11), date(2030, 1, 12), False),  # contenida
+            (date(2030, 1, 1), date(2030, 1, 31), False),  # la contiene
+        ]
+        service = BookingService(self.room)
+        for check_in, check_out, expected in cases:
+            with self.subTest(check_in=check_in, check_out=check_out):
+                self.assertIs(service.is_available(check_in, check_out), expected)
+
+    def test_inactive_bookings_do_not_block(self):
+        _book(self.room, date(2030, 2, 1), date(2030, 2, 5), status=Booking.BookingStatus.CANCELLED)
+        _book(self.room, date(2030, 2, 5), date(2030, 2, 8), status=Booking.BookingStatus.CHECKED_OUT)
+        self.assertTrue(BookingService(self.room).is_available(date(2030, 2, 1), date(2030, 2, 8)))
+
+    def test_checked_in_blocks(self):
+        _book(self.room, date(2030, 2, 1), date(2030, 2, 5), status=Booking.BookingStatus.CHECKED_IN)
+        self.assertFalse(BookingService(self.room).is_available(date(2030, 2, 4), date(2030, 2, 6)))
+
+    def test_maintenance_is_never_available(self):
+        self.room.status = Room.RoomStatus.MAINTENANCE
+        self.room.save()
+        self.assertFalse(BookingService(self.room).is_available(date(2030, 3, 1), date(2030, 3, 2)))
+
+    def test_invalid_range(self):
+        with self.assertRaises(ValidationError):
+            BookingService(self.room).is_available(date(2030, 3, 2), date(2030, 3, 2))
+
+    def test_reserve_back_to_back(self):
+        service = BookingService(self.room)
+        before = service.reserve(date(2030, 1, 8), date(2030, 1, 10), guest_name="Ana")
+        after = service.reserve(date(2030, 1, 13), date(2030, 1, 14), guest_name="Bob")
+        self.assertEqual(before.status, Booking.BookingStatus.RESERVED)
+        self.assertEqual(after.room, self.room)
+        self.assertEqual(Booking.objects.filter(room=self.room).count(), 3)
+
+    def test_reserve_overlap_raises(self):
+        with self.assertRaisesMessage(ValidationError, "no está disponible"):
+            BookingService(self.room).reserve(date(2030, 1, 12), date(2030, 1, 14), guest_name="Ana")
+        self.assertEqual(Booking.objects.count(), 1)
+
+    def test_reserve_rereads_room_status(self):
+        # El servicio se creó antes de que la habitación entrara a mantenimiento
+        service = BookingService(self.room)
+        Room.objects.filter(pk=self.room.pk).update(status=Room.RoomStatus.MAINTENANCE)
+        with self.assertRaisesMessage(ValidationError, "no está disponible"):
+            service.reserve(date(2030, 3, 1), date(2030, 3, 2), guest_name="Ana")
+
+    def test_reserve_room_missing(self):
+        with self.assertRaises(Room.DoesNotExist):
+            BookingService.reserve_room(9999, date(2030, 3, 1), date(2030, 3, 2), guest_name="Ana")
+
+    def test_reserve_translates_check_constraint(self):
+        with self.assertRaisesMessage(ValidationError, "no son válidos"):
+            BookingService(self.room).reserve(date(2030, 3, 1), date(2030, 3, 2), guest_name="Ana", guests_count=0)
+        self.assertEqual(Booking.objects.count(), 1)
+
+    def test_reserve_translates_exclusion_constraint(self):
+        # La restricción no_booking_overlap solo existe en Postgres: simulamos su error
+        error = IntegrityError('conflicting key value violates exclusion constraint "no_booking_overlap"')
+        with mock.patch.object(Booking, "save", side_effect=error):
+            with self.assertRaisesMessage(ValidationError, "no está disponible"):
+                BookingService(self.room).reserve(date(2030, 3, 1), date(2030, 3, 2), guest_name="Ana")
+
+
+class OverlapQueryTests(TestCase):
+    """StayOverlaps y la consulta precompilada deben coincidir en todos los casos."""
+
+    cases = [
+        (date(2030, 1, 5), date(2030, 1, 10)),
+        (date(2030, 1, 13), date(2030, 1, 15)),
+        (date(2030, 1, 5), date(2030, 1, 11)),
+        (date(2030, 1, 12), date(2030, 1, 15)),
+        (date(2030, 1, 11), date(2030, 1, 12)),
+        (date(2030, 1, 1), date(2030, 1, 31)),
+    ]
+
+    def setUp(self):
+        self.room = Room.objects.create(number="101", base_price="100.00", capacity=2)
+        self.other = Room.objects.create(number="102", base_price="100.00", capacity=2)
+        _book(self.room, date(2030, 1, 10), date(2030, 1, 13))
+        _book(self.other, date(2030, 1, 1), date(2030, 1, 31))
+
+    def test_orm_and_precompiled_agree(self):
+        service = BookingService(self.room)
+        for check_in, check_out in self.cases:
+            with self.subTest(check_in=check_in, check_out=check_out):
+                orm = Booking.objects.filter(StayOverlaps(check_in, check_out), room=self.room).exists()
+                expected = not (check_out <= date(2030, 1, 10) or check_in >= date(2030, 1, 13))
+                self.assertIs(orm, expected)
+                self.assertIs(service._has_overlap(self.room, check_in, check_out), expected)
+
+    @skipUnless(find_spec("psycopg") or find_spec("psycopg2"), "requiere el driver de Postgres")
+    def test_postgres_sql_uses_daterange(self):
+        from django.db.backends.postgresql.base import DatabaseWrapper
+
+        settings_dict = {**connection.settings_dict, "NAME": "x", "USER": "", "PASSWORD": "", "HOST": "", "PORT": ""}
+        pg = DatabaseWrapper(settings_dict, "pg")
+        qs = Booking.objects.filter(StayOverlaps(date(2030, 1, 1), date(2030, 1, 4)))
+        sql, params = qs.query.get_compiler(connection=pg).as_sql()
+        self.assertIn("daterange(\"hotel_booking\".\"check_in\", \"hotel_booking\".\"check_out\", '[)') && "
+                      "daterange(%s, %s, '[)')", sql)
+        self.assertEqual(list(params[-2:]), [date(2030, 1, 1), date(2030, 1, 4)])
+
+        with mock.patch("hotel.services.connection", pg):
+            _overlap_query.cache_clear()
+            try:
+                sql, slots = _overlap_query("postgresql")
+            finally:
+                _overlap_query.cache_clear()
+        self.assertEqual([slot for slot in slots if isinstance(slot, str)], ["start", "end", "room"])
+
+
+class RoomPriceTests(TestCase):
+    def test_base_price_is_stored_in_cents(self):
+        room = Room.objects.create(number="101", base_price="1250.50", capacity=2)
+        room.refresh_from_db()
+        self.assertEqual(room.base_price_cents, 125050)
+        self.assertEqual(room.base_price, Decimal("1250.50"))
+        self.assertEqual(str(Room(base_price_cents=15000).base_price), "150.00")
+
+
+class RoomAdminFormTests(TestCase):
+    data = {"number": "101", "room_type": Room.RoomType.SINGLE, "capacity": 2, "status": Room.RoomStatus.AVAILABLE}
+
+    def test_price_is_entered_in_pesos(self):
+        self.assertNotIn("base_price_cents", RoomAdminForm().fields)
+        form = RoomAdminForm(data={**self.data, "base_price": "1250.50"})
+        self.assertTrue(form.is_valid(), form.errors)
+        room = form.save()
+        room.refresh_from_db()
+        self.assertEqual(room.base_price_cents, 125050)
+
+        form = RoomAdminForm(instance=room)
+        self.assertEqual(form["base_price"].value(), Decimal("1250.50"))
+        form = RoomAdminForm(data={**self.data, "base_price": "99"}, instance=room)
+        self.assertTrue(form.is_valid(), form.errors)
+        form.save()
+        room.refresh_from_db()
+        self.assertEqual(room.base_price_cents, 9900)
+
+    # Sin collectstatic no hay manifiesto de WhiteNoise para las plantillas del admin
+    @override_settings(STATICFILES_STORAGE="django.contrib.staticfiles.storage.StaticFilesStorage")
+    def test_admin_change_form_round_trip(self):
+        room = Room.objects.create(number="101", base_price="1250.50", capacity=2)
+        self.client.force_login(User.objects.create_superuser("admin", "admin@example.com", "x"))
+        url = reverse("admin:hotel_room_change", args=[room.pk])
+        self.assertContains(self.client.get(url), 'value="1250.50"')
+
+        response = self.client.post(url, {**self.data, "base_price": "1250"})
+        self.assertRedirects(response, reverse("admin:hotel_room_changelist"))
+        room.refresh_from_db()
+        self.assertEqual(room.base_price, Decimal("1250.00"))
+
+
+class PriceCentsMigrationTests(TransactionTestCase):
+    before = [("hotel", "0003_booking_no_overlap_constraint")]
+    after = [("hotel", "0004_room_base_price_cents")]
+
+    def _migrate(self, targets):
+        executor = MigrationExecutor(connection)
+        executor.loader.build_graph()
+        executor.migrate(targets)
+        return executor.loader.project_state(targets).apps
+
+    def tearDown(self):
+        self._migrate(MigrationExecutor(connection).loader.graph.leaf_nodes())
+
+    def test_prices_are_converted_both_ways(self):
+        OldRoom = self._migrate(self.before).get_model("hotel", "Room")
+        OldRoom.objects.create(number="101", base_price=Decimal("1250.50"), capacity=1)
+
+        NewRoom = self._migrate(self.after).get_model("hotel", "Room")
+        self.assertEqual(NewRoom.objects.get().base_price_cents, 125050)
+
+        OldRoom = self._migrate(self.before).get_model("hotel", "Room")
+        self.assertEqual(OldRoom.objects.get().base_price, Decimal("1250.50"))
+
+
+class RoomAvailabilityViewTests(TestCase):
+    url = reverse("hotel:availability")
+
+    def setUp(self):
+        cache.clear()
+        self.free = Room.objects.create(number="101", base_price="100.00", capacity=2)
+        self.busy = Room.objects.create(number="102", base_price="100.00", capacity=2)
+        Room.objects.create(number="103", base_price="100.00", capacity=2, status=Room.RoomStatus.MAINTENANCE)
+        # Reservas seguidas: la habitación 102 vuelve a estar libre el 10, no el 4
+        _book(self.busy, date(2030, 1, 1), date(2030, 1, 4))
+        _book(self.busy, date(2030, 1, 4), date(2030, 1, 10))
+        _book(self.busy, date(2030, 1, 12), date(2030, 1, 14))
+
+    def search(self, **extra):
+        data = {"check_in": "2030-01-02", "check_out": "2030-01-03", "guests_count": 1, "room_type": "", **extra}
+        return self.client.post(self.url, data)
+
+    def test_excludes_busy_and_maintenance(self):
+        response = self.search()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([room.number for room in response.context["available_rooms"]], ["101"])
+
+    def test_lists_busy_rooms_with_next_free_date(self):
+        busy = self.search().context["busy_rooms"]
+        self.assertEqual([room.number for room in busy], ["102"])
+        self.assertEqual(busy[0].next_free, date(2030, 1, 10))
+        self.assertTrue(BookingService(self.busy).is_available(busy[0].next_free, date(2030, 1, 11)))
+
+    def test_back_to_back_is_available(self):
+        response = self.search(check_in="2030-01-10", check_out="2030-01-12")
+        self.assertEqual([room.number for room in response.context["available_rooms"]], ["101", "102"])
+
+    def test_no_results_message(self):
+        response = self.search(guests_count=9)
+        self.assertEqual(list(response.context["available_rooms"]), [])
+        self.assertContains(response, "No hay habitaciones disponibles en ese rango")
+
+    @mock.patch("hotel.views.ROOMS_PAGE_SIZE", 1)
+    def test_keyset_pagination_of_available_rooms(self):
+        Room.objects.create(number="104", base_price="100.00", capacity=2)
+        first = self.search()
+        self.assertEqual([room.number for room in first.context["available_rooms"]], ["101"])
+        self.assertEqual(first.context["next_after_number"], "101")
+        self.assertContains(first, "Siguientes habitaciones")
+
+        # La habitación ocupada (102) no ocupa lugar en las páginas de libres
+        second = self.search(after_number="101")
+        self.assertEqual([room.number for room in second.context["available_rooms"]], ["104"])
+        self.assertIsNone(second.context["next_after_number"])
+        self.assertEqual(second.context["busy_rooms"], [])
+
+    def test_after_number_is_safe_in_cache_key(self):
+        # Memcached rechaza llaves con espacios: no debe llegar ninguna advertencia
+        with warnings.catch_warnings():
+            warnings.simplefilter("error", CacheKeyWarning)
+            response = self.search(after_number="a b")
+        self.assertEqual(response.status_code, 200)
+
+    def test_cache_is_invalidated_after_booking(self):
+        self.assertEqual([room.number for room in self.search().context["available_rooms"]], ["101"])
+        with self.captureOnCommitCallbacks(execute=True):
+            BookingService(self.free).reserve(date(2030, 1, 2), date(2030, 1, 3), guest_name="Ana")
+        self.assertEqual(list(self.search().context["available_rooms"]), [])
+
+    def test_cache_is_invalidated_after_room_change(self):
+        self.assertEqual([room.number for room in self.search().context["available_rooms"]], ["101"])
+        with self.captureOnCommitCallbacks(execute=True):
+            self.free.status = Room.RoomStatus.MAINTENANCE
+            self.free.save()
+        self.assertEqual(list(self.search().context["available_rooms"]), [])
+
+    @override_settings(CACHES={"default": {"BACKEND": "django.core.cache.backends.dummy.DummyCache"}})
+    def test_works_without_cache(self):
+        # Postgres sin REDIS_URL no cachea (ver CACHES en settings)
+        self.assertEqual([room.number for room in self.search().context["available_rooms"]], ["101"])
+        with self.captureOnCommitCallbacks(execute=True):
+            BookingService(self.free).reserve(date(2030, 1, 2), date(2030, 1, 3), guest_name="Ana")
+        self.assertEqual(list(self.search().context["available_rooms"]), [])
+
+
+class BookingCreateViewTests(TestCase):
+    def setUp(self):
+        self.room = Room.objects.create(number="101", base_price="100.00", capacity=2)
+
+    def post(self, room_id, **extra):
+        data = {
+            "room_id": room_id,
+            "guest_name": "Ana",
+            "guests_count": 1,
+            "check_in": "2030-01-02",
+            "check_out": "2030-01-04",
+            **extra,
+        }
+        return self.client.post(reverse("hotel:booking_create", kwargs={"room_id": room_id}), data)
+
+    def test_creates_booking_and_redirects(self):
+        response = self.post(self.room.pk)
+        booking = Booking.objects.get()
+        self.assertRedirects(response, reverse("hotel:booking_success", kwargs={"booking_id": booking.pk}))
+        self.assertContains(self.client.get(response.url), "101")
+
+    def test_overlap_shows_form_error(self):
+        _book(self.room, date(2030, 1, 3), date(2030, 1, 5))
+        response = self.post(self.room.pk)
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, "no está disponible")
+
+    def test_missing_room_is_404(self):
+        self.assertEqual(self.post(9999).status_code, 404)
@@ -8,22 +8,54 @@
 # ==========================================================
 
 from __future__ import annotations
-from datetime import timedelta
+from datetime import date, timedelta
+from functools import lru_cache
+from types import MappingProxyType
 from typing import Optional
 
 # Importamos los módulos estándar de Django
 from django import forms
 from django.contrib import messages  # para mostrar avisos en la interfaz
+from django.core.cache import cache
 from django.core.exceptions import ValidationError
-from django.http import HttpRequest, HttpResponse
+from django.db.models import Exists, OuterRef, Subquery
+from django.http import Http404, HttpRequest, HttpResponse
 from django.shortcuts import get_object_or_404, redirect, render
 from django.urls import reverse
 from django.utils import timezone  # para manejar fechas sin zonas horarias
 
 # Importamos nuestros modelos y servicios del dominio
-from .models import Booking, Room
+from .cache import AVAILABILITY_TIMEOUT, availability_key, availability_version
+from .models import ACTIVE_BOOKING_Q, Booking, Room, StayOverlaps
 from .services import BookingService
 
+# Valores constantes de los formularios, construidos una sola vez al importar
+# el módulo en lugar de en cada request.
+_ROOM_TYPE_CHOICES = (("", "Cualquiera"), *Room.RoomType.choices)
+_AVAILABILITY_DEFAULT_STAY = timedelta(days=3)
+_BOOKING_DEFAULT_STAY = timedelta(days=2)
+ROOMS_PAGE_SIZE = 25
+BUSY_ROOMS_LIMIT = 10
+
+
+# Valores iniciales por día: solo cambian cuando cambia la fecha, así que los
+# calculamos una vez por día (la llave es el ordinal de hoy). maxsize=2 cubre
+# el cambio de día. Se devuelven en solo lectura porque se comparten entre requests.
+@lru_cache(maxsize=2)
+def _availability_initial(day_ordinal: int) -> MappingProxyType:
+    today = date.fromordinal(day_ordinal)
+    return MappingProxyType({
+        "check_in": today,
+        "check_out": today + _AVAILABILITY_DEFAULT_STAY,
+        "guests_count": 1,
+    })
+
+
+@lru_cache(maxsize=2)
+def _booking_default_dates(day_ordinal: int) -> tuple[date, date]:
+    today = date.fromordinal(day_ordinal)
+    return today, today + _BOOKING_DEFAULT_STAY
+
 
 # ==========================================================
 # 🧾 Formularios
@@ -33,6 +65,18 @@ from .services import BookingService
 # Python y generar los campos HTML correspondientes.
 # ==========================================================
 
+def _validate_date_range(cleaned: dict) -> None:
+    """
+    Validación compartida por ambos formularios: la fecha de entrada
+    debe ser menor que la fecha de salida. Si algún campo falló
+    (None), ya tiene su propio error y no validamos el rango.
+    """
+    ci = cleaned.get("check_in")
+    co = cleaned.get("check_out")
+    if ci is not None and co is not None and ci >= co:
+        raise forms.ValidationError("La fecha de entrada debe ser menor a la de salida.")
+
+
 class AvailabilityForm(forms.Form):
     """
     Formulario para buscar habitaciones disponibles.
@@ -41,10 +85,12 @@ class AvailabilityForm(forms.Form):
     check_in = forms.DateField(widget=forms.DateInput(attrs={"type": "date"}))
     check_out = forms.DateField(widget=forms.DateInput(attrs={"type": "date"}))
     room_type = forms.ChoiceField(
-        choices=[("", "Cualquiera")] + list(Room.RoomType.choices),
+        choices=_ROOM_TYPE_CHOICES,
         required=False,
     )
     guests_count = forms.IntegerField(min_value=1, initial=1)
+    # Paginación por llave (keyset): número de la última habitación de la página anterior
+    after_number = forms.CharField(max_length=10, required=False, widget=forms.HiddenInput)
 
     def clean(self):
         """
@@ -52,10 +98,7 @@ class AvailabilityForm(forms.Form):
         debe ser menor que la fecha de salida.
         """
         cleaned = super().clean()
-        ci = cleaned.get("check_in")
-        co = cleaned.get("check_out")
-        if ci and co and ci >= co:
-            raise forms.ValidationError("La fecha de entrada debe ser menor a la de salida.")
+        _validate_date_range(cleaned)
         return cleaned
 
 
@@ -75,10 +118,7 @@ class BookingForm(forms.Form):
         Misma validación de rango de fechas.
         """
         cleaned = super().clean()
-        ci = cleaned.get("check_in")
-        co = cleaned.get("check_out")
-        if ci and co and ci >= co:
-            raise forms.ValidationError("La fecha de entrada debe ser menor a la de salida.")
+        _validate_date_range(cleaned)
         return cleaned
 
 
@@ -102,53 +142,102 @@ def room_availability(request: HttpRequest) -> HttpResponse:
     delegarse al BookingService (is_available), pero aquí se deja
     explícita para fines educativos.
     """
-    today = timezone.localdate()  # obtiene la fecha actual (sin hora)
-    initial = {
-        "check_in": today,
-        "check_out": today + timedelta(days=3),
-        "guests_count": 1,
-    }
-
     if request.method == "POST":
         # Si el usuario envía el formulario (POST)
         form = AvailabilityForm(request.POST)
-        available_rooms = []
+        available_rooms, busy_rooms, next_after_number = [], [], None
         if form.is_valid():
             # Extraemos los datos limpios del formulario
             check_in = form.cleaned_data["check_in"]
             check_out = form.cleaned_data["check_out"]
             guests_count = form.cleaned_data["guests_count"]
             room_type = form.cleaned_data["room_type"]
+            after_number = form.cleaned_data["after_number"]
 
             # 1. Filtramos habitaciones disponibles por capacidad y estado
             qs = Room.objects.exclude(status=Room.RoomStatus.MAINTENANCE).filter(capacity__gte=guests_count)
             if room_type:
                 qs = qs.filter(room_type=room_type)
 
-            # 2. Calculamos las habitaciones ocupadas en el rango dado
-            busy_room_ids = Booking.objects.filter(
-                status__in=[Booking.BookingStatus.RESERVED, Booking.BookingStatus.CHECKED_IN],
-                check_in__lt=check_out,
-                check_out__gt=check_in,
-            ).values_list("room_id", flat=True)
-
-            # 3. Excluimos las habitaciones ocupadas del conjunto base
-            available_rooms = qs.exclude(id__in=busy_room_ids)
+            # 2. Reservas activas que se solapan con el rango, correlacionadas
+            #    con cada habitación (OuterRef("pk") = la habitación del query externo)
+            conflicts = Booking.objects.filter(
+                ACTIVE_BOOKING_Q,
+                StayOverlaps(check_in, check_out),
+                room=OuterRef("pk"),
+            )
+
+            # 3. Habitaciones libres: las que NO tienen reservas en conflicto.
+            #    Al estar correlacionado, el NOT EXISTS solo se evalúa para las
+            #    habitaciones que pasan el paso 1: si ninguna pasa (p. ej. más
+            #    huéspedes que cualquier capacidad) hotel_booking ni se consulta.
+            #    Solo las columnas que muestra la plantilla.
+            rooms = qs.only("id", "number", "room_type", "base_price_cents", "capacity", "status").order_by("number")
+            available = rooms.filter(~Exists(conflicts))
+
+            # 4. Paginamos las libres por llave: en vez de OFFSET, pedimos las
+            #    habitaciones con número mayor al último mostrado (number es único
+            #    e indexado).
+            if after_number:
+                available = available.filter(number__gt=after_number)
+
+            # 5. Habitaciones ocupadas (lista acotada, solo en la primera página) con
+            #    la próxima fecha en que vuelven a estar libres.
+            #    Próxima fecha libre (huecos entre reservas): el primer check_out
+            #    posterior a la entrada buscada que NO queda cubierto por otra
+            #    reserva activa. Así se recorre la cadena de reservas seguidas
+            #    ([1, 4) y [4, 10) → libre desde el 10, no desde el 4).
+            covering = Booking.objects.filter(
+                ACTIVE_BOOKING_Q,
+                room=OuterRef("room"),
+                check_in__lte=OuterRef("check_out"),
+                check_out__gt=OuterRef("check_out"),
+            )
+            next_free = (
+                Booking.objects.filter(ACTIVE_BOOKING_Q, room=OuterRef("pk"), check_out__gt=check_in)
+                .filter(~Exists(covering))
+                .order_by("check_out")
+                .values("check_out")[:1]
+            )
+            busy = rooms.filter(Exists(conflicts)).annotate(next_free=Subquery(next_free))
+
+            def search():
+                # list() ejecuta cada consulta una sola vez; la plantilla recorre las listas.
+                # Pedimos una habitación libre de más solo para saber si hay otra página.
+                page = list(available[: ROOMS_PAGE_SIZE + 1])
+                has_next = len(page) > ROOMS_PAGE_SIZE
+                page = page[:ROOMS_PAGE_SIZE]
+                return (
+                    page,
+                    [] if after_number else list(busy[:BUSY_ROOMS_LIMIT]),
+                    page[-1].number if has_next else None,
+                )
+
+            # El resultado se cachea por combinación de filtros (ver hotel/cache.py).
+            available_rooms, busy_rooms, next_after_number = cache.get_or_set(
+                availability_key(check_in, check_out, room_type, guests_count, after_number),
+                search,
+                AVAILABILITY_TIMEOUT,
+                version=availability_version(),
+            )
 
             # Si no hay resultados, mostramos un mensaje de advertencia
-            if not available_rooms.exists():
+            if not available_rooms:
                 messages.info(request, "No hay habitaciones disponibles en ese rango con los filtros seleccionados.")
 
         # Renderizamos la plantilla con los resultados (o errores)
         context = {
             "form": form,
             "available_rooms": available_rooms,
+            "busy_rooms": busy_rooms,
+            "next_after_number": next_after_number,
             "results": True,
         }
         return render(request, "hotel/availability.html", context)
 
     # Si es un GET (primera carga), mostramos el formulario vacío con valores iniciales
-    form = AvailabilityForm(initial=initial)
+    # timezone.localdate() obtiene la fecha actual (sin hora)
+    form = AvailabilityForm(initial=_availability_initial(timezone.localdate().toordinal()))
     return render(request, "hotel/availability.html", {"form": form, "results": False})
 
 
@@ -158,19 +247,16 @@ def booking_create(request: HttpRequest, room_id: int) -> HttpResponse:
 
     Flujo:
     - GET → muestra el formulario prellenado con la habitación seleccionada.
-    - POST → valida el formulario y llama a BookingService.reserve().
+    - POST → valida el formulario y llama a BookingService.reserve_room().
 
     Si la reserva se crea con éxito, redirige a la pantalla de confirmación.
     """
-    # Busca la habitación por su ID o devuelve un error 404 si no existe
-    room = get_object_or_404(Room, pk=room_id)
-
     if request.method == "POST":
         form = BookingForm(request.POST)
         if form.is_valid():
             # Validamos que el ID de la habitación en el formulario
             # coincida con el que viene en la URL (seguridad básica)
-            if form.cleaned_data["room_id"] != room.id:
+            if form.cleaned_data["room_id"] != room_id:
                 form.add_error(None, "La habitación del formulario no coincide con la URL.")
             else:
                 # Extraemos los datos del formulario
@@ -180,30 +266,40 @@ def booking_create(request: HttpRequest, room_id: int) -> HttpResponse:
                 guests_count = form.cleaned_data["guests_count"]
 
                 try:
-                    # Intentamos crear la reserva usando el servicio
-                    booking = BookingService(room).reserve(
+                    # Intentamos crear la reserva usando el servicio. No leemos la
+                    # habitación antes: reserve_room() la lee (y bloquea) en su transacción.
+                    booking = BookingService.reserve_room(
+                        room_id,
                         check_in=check_in,
                         check_out=check_out,
                         guest_name=guest_name,
                         guests_count=guests_count,
                     )
+                except Room.DoesNotExist:
+                    raise Http404("No existe la habitación.")
                 except ValidationError as e:
                     # Si hay error de negocio (no disponible, fechas inválidas, etc.)
                     form.add_error(None, e.message if hasattr(e, "message") else str(e))
                 else:
                     # Si todo sale bien, mostramos un mensaje y redirigimos
-                    messages.success(request, f"Reserva creada (# {booking.pk}) para la habitación {room.number}.")
+                    messages.success(
+                        request, f"Reserva creada (# {booking.pk}) para la habitación {booking.room.number}."
+                    )
                     return redirect(reverse("hotel:booking_success", kwargs={"booking_id": booking.pk}))
 
         # Si el formulario no es válido, se vuelve a mostrar con los errores
+        room = get_object_or_404(Room, pk=room_id)
         return render(request, "hotel/booking_create.html", {"form": form, "room": room})
 
-    # GET: inicializamos valores por defecto en el formulario
-    today = timezone.localdate()
+    # GET: buscamos la habitación por su ID o devolvemos un 404 si no existe
+    room = get_object_or_404(Room, pk=room_id)
+
+    # Inicializamos valores por defecto en el formulario
+    check_in, check_out = _booking_default_dates(timezone.localdate().toordinal())
     initial = {
         "room_id": room.id,
-        "check_in": today,
-        "check_out": today + timedelta(days=2),
+        "check_in": check_in,
+        "check_out": check_out,
         "guests_count": 1,
     }
     form = BookingForm(initial=initial)
@@ -216,6 +312,13 @@ def booking_success(request: HttpRequest, booking_id: int) -> HttpResponse:
 
     Muestra la información completa de la reserva recién creada.
     """
-    # select_related("room") evita múltiples consultas a la base de datos.
-    booking = get_object_or_404(Booking.objects.select_related("room"), pk=booking_id)
+    # select_related("room") evita múltiples consultas a la base de datos;
+    # only() limita el SELECT a las columnas que se muestran.
+    booking = get_object_or_404(
+        Booking.objects.select_related("room").only(
+            "id", "guest_name", "check_in", "check_out", "status",
+            "room__number", "room__room_type",
+        ),
+        pk=booking_id,
+    )
     return render(request, "hotel/booking_success.html", {"booking": booking})